@@ -0,0 +1,859 @@
+"""
+Offline discrete-event simulator for tuning the record signing workflow
+
+Models the Step Functions loop (Initialize -> Check -> Submit -> Wait -> Check),
+the SQS event source mapping feeding the batch processor, processor timing
+(fetch/key/sign/write/release/count), KMS latency and throttling, contention on
+the key pool from get_available_key, Lambda timeouts and SQS redelivery. It
+follows what the code in src/ actually does, for example:
+
+- the processor only handles the first message of an SQS batch, the rest are
+  deleted along with it
+- get_unsigned_batch commits right after selecting, so concurrent processors can
+  fetch the same rows ("released" row locking)
+- a processor killed by the Lambda timeout never releases its key
+- a sign request that is still throttled after botocore's retries fails the
+  processor, which releases its key, and the SQS batch is redelivered
+
+batch_size and concurrency stay the same on every iteration. This relies on the
+SubmitBatches state keeping the Checker's output (its ResultPath), since the
+Checker Lambda has no BATCH_SIZE/CONCURRENCY environment to fall back on.
+
+Limitations: everything runs against a single unpartitioned records table, and
+KMS throttling is approximated. Requests above the quota slow every signer down
+equally, and each attempt is throttled with probability equal to the share of
+demand over the quota. Retry backoff and the bursty nature of real throttling
+are not modelled.
+
+Usage:
+    python scripts/simulator.py run --set batch_size=1000 --set concurrency=20
+    python scripts/simulator.py sweep --grid batch_size=1000,5000,10000 --grid concurrency=5,10,20
+    python scripts/simulator.py calibrate batch_timings.log --total-records 100000 > calibration.json
+
+Calibration files are JSON objects of parameter overrides, passed with --calibration.
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import random
+import sys
+from collections import deque
+from multiprocessing import Pool
+
+DEFAULT_PARAMS = {
+    # Workload and state machine input
+    "total_records": 100000,
+    "batch_size": 10000,
+    "concurrency": 10,
+    "processor_batch_size": None,  # BATCH_SIZE env of the processor, defaults to batch_size
+    "initialize_db": False,
+    # Infrastructure settings from cloudformattion.yaml
+    "sqs_batch_size": 10,
+    "visibility_timeout": 300,
+    "max_receive_count": 3,
+    "wait_seconds": 30,
+    "processor_timeout": 300,
+    "processor_memory_mb": 512,
+    "initializer_memory_mb": 1024,
+    "submitter_memory_mb": 256,
+    "checker_memory_mb": 128,
+    "finalizer_memory_mb": 128,
+    "num_keys": 100,
+    # "released" matches get_unsigned_batch today, "held" keeps rows locked until written
+    "row_locking": "released",
+    # Lambda and SQS behaviour
+    "max_lambda_concurrency": 1000,
+    "num_pollers": 5,
+    "poll_seconds": 0.05,
+    "invoke_seconds": 0.05,
+    "cold_start_seconds": 1.0,
+    "send_message_seconds": 0.02,
+    # Database timings
+    "db_connect_seconds": 0.1,
+    "insert_per_record_seconds": 0.00005,
+    "count_base_seconds": 0.01,
+    "count_per_row_seconds": 0.0000002,
+    "fetch_base_seconds": 0.01,
+    "fetch_per_record_seconds": 0.000002,
+    "write_per_record_seconds": 0.0005,
+    # Key pool (DynamoDB) timings
+    "key_seconds": 0.03,
+    "release_seconds": 0.01,
+    "key_item_bytes": 200,
+    # KMS signing latency per record (lognormal) and account request quota
+    "kms_latency_mean": 0.02,
+    "kms_latency_sigma": 0.5,
+    "kms_quota_rps": 500,
+    "kms_max_attempts": 5,  # botocore's default attempts per request, including retries
+    # Prices (us-east-1 list prices)
+    "price_lambda_gb_second": 0.0000166667,
+    "price_lambda_request": 0.0000002,
+    "price_sfn_transition": 0.000025,
+    "price_sqs_request": 0.0000004,
+    "price_kms_request": 0.000003,  # RSA_2048 keys, as created by generate_test_keys
+    "price_dynamodb_read": 0.000000125,
+    "price_dynamodb_write": 0.000000625,
+    # Give up on runs that never finish; runs also stop once every key has leaked
+    "max_sim_seconds": 86400,
+}
+
+# Result fields averaged over replications in sweep summaries
+SUMMARY_FIELDS = (
+    "total_seconds",
+    "total_cost",
+    "cost_lambda",
+    "cost_step_functions",
+    "cost_sqs",
+    "cost_kms",
+    "cost_dynamodb",
+    "iterations",
+    "invocations",
+    "empty_invocations",
+    "failed_invocations",
+    "timeouts",
+    "dlq_messages",
+    "double_signed",
+    "key_collisions",
+    "keys_exhausted",
+    "leaked_keys",
+    "kms_throttled_seconds",
+    "kms_throttle_errors",
+)
+
+
+class IntervalSet:
+    """Sorted, non-overlapping [start, end) ranges of record ids"""
+
+    def __init__(self, ranges=()):
+        self.ranges = [list(r) for r in ranges]
+        self.size = sum(end - start for start, end in self.ranges)
+
+    def first(self, n):
+        """Return the ranges covering the first n ids, without removing them"""
+        taken = []
+        for start, end in self.ranges:
+            if n <= 0:
+                break
+            stop = min(end, start + n)
+            taken.append((start, stop))
+            n -= stop - start
+        return taken
+
+    def remove(self, ranges):
+        """Remove the given ranges and return how many ids were actually removed"""
+        removed = 0
+        for start, end in ranges:
+            kept = []
+            for a, b in self.ranges:
+                if b <= start or a >= end:
+                    kept.append([a, b])
+                    continue
+                if a < start:
+                    kept.append([a, start])
+                if b > end:
+                    kept.append([end, b])
+                removed += min(b, end) - max(a, start)
+            self.ranges = kept
+        self.size -= removed
+        return removed
+
+    def add(self, ranges):
+        """Add the given ranges back, merging neighbours"""
+        merged = []
+        for start, end in sorted([tuple(r) for r in self.ranges] + list(ranges)):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.ranges = merged
+        self.size = sum(end - start for start, end in merged)
+
+
+class Sign:
+    """Command yielded by a process to sign records through the shared KMS quota"""
+
+    def __init__(self, records, rate):
+        self.records = records
+        self.rate = rate
+
+
+class Process:
+    """A simulated Lambda or state machine run, driven by a generator"""
+
+    def __init__(self, gen, deadline=None, on_kill=None):
+        self.gen = gen
+        self.deadline = deadline
+        self.on_kill = on_kill
+
+
+class Simulation:
+    """Discrete-event simulation of one record signing execution"""
+
+    def __init__(self, params, seed=0):
+        self.p = dict(DEFAULT_PARAMS, **params)
+        if self.p["row_locking"] not in ("released", "held"):
+            raise ValueError(f"Unsupported row locking mode: {self.p['row_locking']}")
+
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.events = []
+        self.seq = itertools.count()
+        self.finished_at = None
+
+        total = self.p["total_records"]
+        self.unsigned = IntervalSet([(1, total + 1)] if total > 0 else [])
+        self.available = IntervalSet(self.unsigned.ranges)
+
+        self.queue = deque()
+        self.idle_pollers = self.p["num_pollers"]
+        self.running = 0
+        self.warm = 0
+
+        self.key_in_use = [False] * self.p["num_keys"]
+        self.key_last_used = [0.0] * self.p["num_keys"]
+
+        self.sign_jobs = {}
+        self.sign_heap = []
+        self.sign_fail_heap = []
+        self.sign_hazard = 0.0
+        self.sign_hazard_rate = 0.0
+        self.sign_demand = 0.0
+        self.sign_factor = 1.0
+        self.sign_clock = 0.0
+        self.sign_updated = 0.0
+        self.sign_version = 0
+        self.leaked_keys = set()
+        self.key_holders = 0
+
+        self.stats = {
+            "iterations": 0,
+            "messages_sent": 0,
+            "invocations": 0,
+            "cold_starts": 0,
+            "empty_invocations": 0,
+            "failed_invocations": 0,
+            "timeouts": 0,
+            "dlq_messages": 0,
+            "records_signed": 0,
+            "double_signed": 0,
+            "key_collisions": 0,
+            "keys_exhausted": 0,
+            "kms_throttled_seconds": 0.0,
+            "kms_throttle_errors": 0,
+            "lambda_gb_seconds": 0.0,
+            "lambda_requests": 0,
+            "sfn_transitions": 0,
+            "sqs_requests": 0,
+            "kms_requests": 0,
+            "dynamodb_reads": 0,
+            "dynamodb_writes": 0,
+        }
+
+    # Event loop
+
+    def schedule(self, at, callback, *args):
+        heapq.heappush(self.events, (at, next(self.seq), callback, args))
+
+    def start(self, gen, deadline=None, on_kill=None):
+        self._step(Process(gen, deadline, on_kill))
+
+    def run(self):
+        """Run the simulation until the state machine completes or max_sim_seconds passes
+
+        Returns:
+            dict: Run time, counters and estimated cost
+        """
+        self.start(self._state_machine())
+        while self.events and self.finished_at is None and not self._stalled():
+            at, _, callback, args = heapq.heappop(self.events)
+            if at > self.p["max_sim_seconds"]:
+                break
+            self.now = at
+            callback(*args)
+        return self._results()
+
+    def _stalled(self):
+        """Whether every key has leaked and no running processor can release one any more"""
+        return len(self.leaked_keys) == self.p["num_keys"] and self.key_holders == 0
+
+    def _step(self, proc, value=None):
+        try:
+            command = proc.gen.send(value)
+        except StopIteration:
+            return
+
+        if isinstance(command, Sign):
+            self._start_signing(proc, command)
+            return
+
+        at = self.now + command
+        if proc.deadline is not None and at > proc.deadline:
+            self.schedule(proc.deadline, self._kill, proc)
+        else:
+            self.schedule(at, self._step, proc)
+
+    def _kill(self, proc):
+        if proc in self.sign_jobs:
+            self._advance_signing()
+            self.sign_demand -= self.sign_jobs.pop(proc)[0]
+            self._reschedule_signing()
+        proc.gen.close()
+        if proc.on_kill:
+            proc.on_kill()
+
+    def _kill_if_signing(self, proc):
+        if proc in self.sign_jobs:
+            self._kill(proc)
+
+    # KMS signing, shared fairly between processors once the quota is exceeded.
+    # Every job is slowed down by the same factor, so progress is tracked on a
+    # shared virtual clock that advances at that factor; a job signing n records
+    # at rate r finishes once the clock has advanced n / r past its start.
+    #
+    # While throttled, a request fails once all of its attempts are throttled.
+    # A job at rate r then fails at rate r * factor * (1 - factor) ** attempts,
+    # so failures are tracked the same way on a shared hazard clock advancing at
+    # factor * (1 - factor) ** attempts, against an exponential budget per job.
+
+    def _start_signing(self, proc, command):
+        self._advance_signing()
+        self.sign_jobs[proc] = (command.rate, self.sign_clock)
+        self.sign_demand += command.rate
+        heapq.heappush(self.sign_heap, (self.sign_clock + command.records / command.rate, next(self.seq), proc))
+        fail_at = self.sign_hazard + self.rng.expovariate(1.0) / command.rate
+        heapq.heappush(self.sign_fail_heap, (fail_at, next(self.seq), proc))
+        if proc.deadline is not None:
+            self.schedule(proc.deadline, self._kill_if_signing, proc)
+        self._reschedule_signing()
+
+    def _advance_signing(self):
+        elapsed = self.now - self.sign_updated
+        if elapsed > 0 and self.sign_jobs:
+            self.sign_clock += self.sign_factor * elapsed
+            self.sign_hazard += self.sign_hazard_rate * elapsed
+            if self.sign_factor < 1.0:
+                self.stats["kms_throttled_seconds"] += elapsed
+        self.sign_updated = self.now
+
+    def _reschedule_signing(self):
+        self.sign_version += 1
+        if not self.sign_jobs:
+            self.sign_demand = 0.0
+            self.sign_heap = []
+            self.sign_fail_heap = []
+            return
+
+        self.sign_factor = min(1.0, self.p["kms_quota_rps"] / self.sign_demand)
+        self.sign_hazard_rate = self.sign_factor * (1.0 - self.sign_factor) ** self.p["kms_max_attempts"]
+        while self.sign_heap[0][2] not in self.sign_jobs:
+            heapq.heappop(self.sign_heap)
+        while self.sign_fail_heap[0][2] not in self.sign_jobs:
+            heapq.heappop(self.sign_fail_heap)
+
+        next_at = self.now + max(self.sign_heap[0][0] - self.sign_clock, 0.0) / self.sign_factor
+        if self.sign_hazard_rate > 0:
+            fail_at = self.now + max(self.sign_fail_heap[0][0] - self.sign_hazard, 0.0) / self.sign_hazard_rate
+            next_at = min(next_at, fail_at)
+        self.schedule(next_at, self._signing_event, self.sign_version)
+
+    def _signing_event(self, version):
+        if version != self.sign_version:
+            return
+
+        self._advance_signing()
+        done = []
+        while self.sign_heap and self.sign_heap[0][0] <= self.sign_clock + 1e-9:
+            _, _, proc = heapq.heappop(self.sign_heap)
+            if proc in self.sign_jobs:
+                self.sign_demand -= self.sign_jobs.pop(proc)[0]
+                done.append(proc)
+
+        failed = []
+        while self.sign_fail_heap and self.sign_fail_heap[0][0] <= self.sign_hazard + 1e-9:
+            _, _, proc = heapq.heappop(self.sign_fail_heap)
+            if proc in self.sign_jobs:
+                rate, started = self.sign_jobs.pop(proc)
+                self.sign_demand -= rate
+                # Records signed before the failing request are still billed
+                self.stats["kms_requests"] += int((self.sign_clock - started) * rate)
+                self.stats["kms_throttle_errors"] += 1
+                failed.append(proc)
+        self._reschedule_signing()
+
+        for proc in done:
+            self._step(proc, True)
+        for proc in failed:
+            self._step(proc, False)
+
+    def _sign_rate(self, records):
+        """Sample the unthrottled signing rate (records/second) of one batch"""
+        mean = self.p["kms_latency_mean"]
+        sigma = self.p["kms_latency_sigma"]
+        if records <= 30:
+            mu = math.log(mean) - sigma**2 / 2
+            total = sum(self.rng.lognormvariate(mu, sigma) for _ in range(records))
+        else:
+            # The sum of many per-record latencies is close to normal
+            std = mean * math.sqrt(math.exp(sigma**2) - 1)
+            total = self.rng.gauss(records * mean, math.sqrt(records) * std)
+        return records / max(total, records * mean * 0.1)
+
+    # Cost helpers
+
+    def _bill_lambda(self, memory_mb, seconds):
+        self.stats["lambda_gb_seconds"] += memory_mb / 1024 * seconds
+        self.stats["lambda_requests"] += 1
+
+    def _count_seconds(self):
+        return self.p["count_base_seconds"] + self.p["count_per_row_seconds"] * self.p["total_records"]
+
+    # Step Functions state machine
+
+    def _state_machine(self):
+        p = self.p
+
+        # Initialize
+        self.stats["sfn_transitions"] += 1
+        started = self.now
+        yield p["invoke_seconds"] + p["db_connect_seconds"]
+        if p["initialize_db"]:
+            yield p["insert_per_record_seconds"] * p["total_records"]
+        yield self._count_seconds()
+        self._bill_lambda(p["initializer_memory_mb"], self.now - started)
+
+        while True:
+            # CheckRemainingRecords and AreRecordsRemaining
+            self.stats["sfn_transitions"] += 2
+            started = self.now
+            yield p["invoke_seconds"] + p["db_connect_seconds"] + self._count_seconds()
+            self._bill_lambda(p["checker_memory_mb"], self.now - started)
+            remaining = self.unsigned.size
+            if remaining <= 0:
+                break
+
+            # SubmitBatches
+            self.stats["iterations"] += 1
+            self.stats["sfn_transitions"] += 1
+            started = self.now
+            yield p["invoke_seconds"] + p["db_connect_seconds"] + self._count_seconds()
+            remaining = self.unsigned.size
+            batches = min(p["concurrency"], (remaining + p["batch_size"] - 1) // p["batch_size"])
+            for _ in range(batches):
+                yield p["send_message_seconds"]
+                self.stats["sqs_requests"] += 1
+                self.stats["messages_sent"] += 1
+                self._enqueue({"receive_count": 0, "receipt": None, "deleted": False})
+            self._bill_lambda(p["submitter_memory_mb"], self.now - started)
+
+            # WaitForCompletion
+            self.stats["sfn_transitions"] += 1
+            yield p["wait_seconds"]
+
+        # CompleteProcess
+        self.stats["sfn_transitions"] += 1
+        started = self.now
+        yield p["invoke_seconds"]
+        self._bill_lambda(p["finalizer_memory_mb"], self.now - started)
+        self.finished_at = self.now
+
+    # SQS queue and event source mapping
+
+    def _enqueue(self, message):
+        self.queue.append(message)
+        self._wake_pollers()
+
+    def _wake_pollers(self):
+        while self.idle_pollers > 0 and self.queue and self.running < self.p["max_lambda_concurrency"]:
+            self.idle_pollers -= 1
+            self.schedule(self.now + self.p["poll_seconds"], self._poll)
+
+    def _poll(self):
+        self.stats["sqs_requests"] += 1
+        messages = []
+        if self.running < self.p["max_lambda_concurrency"]:
+            while self.queue and len(messages) < self.p["sqs_batch_size"]:
+                message = self.queue.popleft()
+                message["receive_count"] += 1
+                if message["receive_count"] > self.p["max_receive_count"]:
+                    self.stats["dlq_messages"] += 1
+                    message["deleted"] = True
+                    continue
+                # The message becomes visible again once the visibility timeout passes, unless deleted first
+                message["receipt"] = next(self.seq)
+                self.schedule(self.now + self.p["visibility_timeout"], self._make_visible, message, message["receipt"])
+                messages.append((message, message["receipt"]))
+
+        if messages:
+            self._invoke_processor(messages)
+
+        if self.queue and self.running < self.p["max_lambda_concurrency"]:
+            self.schedule(self.now + self.p["poll_seconds"], self._poll)
+        else:
+            self.idle_pollers += 1
+
+    def _make_visible(self, message, receipt):
+        if message["deleted"] or message["receipt"] != receipt:
+            return
+        self._enqueue(message)
+
+    # Batch processor
+
+    def _invoke_processor(self, messages):
+        self.running += 1
+        self.stats["invocations"] += 1
+        cold = self.warm == 0
+        if cold:
+            self.stats["cold_starts"] += 1
+        else:
+            self.warm -= 1
+
+        invocation = {"messages": messages, "started": self.now, "rows": [], "key": None, "cold": cold}
+        self.start(
+            self._processor(invocation),
+            deadline=self.now + self.p["processor_timeout"],
+            on_kill=lambda: self._processor_killed(invocation),
+        )
+
+    def _processor(self, invocation):
+        p = self.p
+        if invocation["cold"]:
+            yield p["cold_start_seconds"]
+        yield p["invoke_seconds"] + p["db_connect_seconds"]
+
+        # get_unsigned_batch
+        batch_size = p["processor_batch_size"] or p["batch_size"]
+        yield p["fetch_base_seconds"] + p["fetch_per_record_seconds"] * batch_size
+        if p["row_locking"] == "held":
+            rows = self.available.first(batch_size)
+            self.available.remove(rows)
+        else:
+            rows = self.unsigned.first(batch_size)
+        invocation["rows"] = rows
+        records = sum(end - start for start, end in rows)
+        if records == 0:
+            self.stats["empty_invocations"] += 1
+            self._finish_processor(invocation, success=True)
+            return
+
+        # get_available_key scans for free keys, then marks the least recently used one
+        free = [key for key, in_use in enumerate(self.key_in_use) if not in_use]
+        self.stats["dynamodb_reads"] += max(1, math.ceil(p["num_keys"] * p["key_item_bytes"] / 4096))
+        yield p["key_seconds"]
+        if not free:
+            self.stats["keys_exhausted"] += 1
+            self._finish_processor(invocation, success=False)
+            return
+        key = min(free, key=lambda k: self.key_last_used[k])
+        if self.key_in_use[key]:
+            self.stats["key_collisions"] += 1
+        self.key_in_use[key] = True
+        self.stats["dynamodb_writes"] += 1
+        invocation["key"] = key
+        self.key_holders += 1
+
+        signed = yield Sign(records, self._sign_rate(records))
+        if not signed:
+            # sign_data raised ThrottlingException; the finally block still releases the key
+            yield p["release_seconds"]
+            self._release_key(invocation)
+            self._finish_processor(invocation, success=False)
+            return
+        self.stats["kms_requests"] += records
+
+        # update_signatures commits all rows at once
+        yield p["write_per_record_seconds"] * records
+        newly_signed = self.unsigned.remove(rows)
+        self.stats["records_signed"] += records
+        self.stats["double_signed"] += records - newly_signed
+        invocation["rows"] = []
+
+        yield p["release_seconds"]
+        self._release_key(invocation)
+
+        yield self._count_seconds()
+        self._finish_processor(invocation, success=True)
+
+    def _release_key(self, invocation):
+        key = invocation["key"]
+        self.key_in_use[key] = False
+        self.key_last_used[key] = self.now
+        self.leaked_keys.discard(key)
+        self.stats["dynamodb_writes"] += 1
+        invocation["key"] = None
+        self.key_holders -= 1
+
+    def _processor_killed(self, invocation):
+        self.stats["timeouts"] += 1
+        # The finally block never runs on a Lambda timeout, so the key stays marked in use
+        if invocation["key"] is not None and self.key_in_use[invocation["key"]]:
+            self.leaked_keys.add(invocation["key"])
+        self._finish_processor(invocation, success=False)
+
+    def _finish_processor(self, invocation, success):
+        self._bill_lambda(self.p["processor_memory_mb"], self.now - invocation["started"])
+        self.running -= 1
+        self.warm += 1
+        if invocation["key"] is not None:
+            self.key_holders -= 1
+
+        if success:
+            self.stats["sqs_requests"] += 1  # DeleteMessageBatch
+            # Deleting with a receipt from an earlier receive leaves the message in the queue
+            for message, receipt in invocation["messages"]:
+                if message["receipt"] == receipt:
+                    message["deleted"] = True
+        else:
+            # Failed messages reappear once their visibility timeout passes
+            self.stats["failed_invocations"] += 1
+            if self.p["row_locking"] == "held" and invocation["rows"]:
+                self.available.add(invocation["rows"])
+
+        self._wake_pollers()
+
+    # Results
+
+    def _results(self):
+        p = self.p
+        s = self.stats
+        costs = {
+            "lambda": s["lambda_gb_seconds"] * p["price_lambda_gb_second"]
+            + s["lambda_requests"] * p["price_lambda_request"],
+            "step_functions": s["sfn_transitions"] * p["price_sfn_transition"],
+            "sqs": s["sqs_requests"] * p["price_sqs_request"],
+            "kms": s["kms_requests"] * p["price_kms_request"],
+            "dynamodb": s["dynamodb_reads"] * p["price_dynamodb_read"]
+            + s["dynamodb_writes"] * p["price_dynamodb_write"],
+        }
+        result = {
+            "finished": self.finished_at is not None,
+            "total_seconds": self.finished_at if self.finished_at is not None else self.now,
+            "records_remaining": self.unsigned.size,
+            "leaked_keys": len(self.leaked_keys),
+            "total_cost": sum(costs.values()),
+        }
+        result.update(s)
+        result.update({f"cost_{name}": cost for name, cost in costs.items()})
+        return result
+
+
+def simulate(params, seed=0):
+    """Run a single simulation with the given parameter overrides"""
+    return Simulation(params, seed).run()
+
+
+def _simulate_job(job):
+    params, seed = job
+    return params, simulate(params, seed)
+
+
+def sweep(base_params, grid, replications=1, workers=1):
+    """Simulate every combination of the grid, averaging over replications
+
+    Args:
+        base_params: Parameter overrides shared by every configuration
+        grid: Mapping of parameter name to the list of values to try
+        replications: Number of seeds to run per configuration
+        workers: Number of worker processes
+
+    Returns:
+        list: One summary dict per configuration
+    """
+    names = list(grid)
+    configs = [dict(base_params, **dict(zip(names, values))) for values in itertools.product(*grid.values())]
+    jobs = [(config, seed) for config in configs for seed in range(replications)]
+
+    if workers > 1:
+        with Pool(workers) as pool:
+            outcomes = pool.map(_simulate_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+    else:
+        outcomes = [_simulate_job(job) for job in jobs]
+
+    summaries = []
+    for i, config in enumerate(configs):
+        results = [result for _, result in outcomes[i * replications : (i + 1) * replications]]
+        summary = {name: config[name] for name in names}
+        summary["finished_rate"] = sum(r["finished"] for r in results) / replications
+        for field in SUMMARY_FIELDS:
+            summary[field] = sum(r[field] for r in results) / replications
+        summaries.append(summary)
+    return summaries
+
+
+def _least_squares(xs, ys):
+    """Fit y = a + b * x, falling back to a line through the origin when x does not vary"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return 0.0, (mean_y / mean_x if mean_x else 0.0)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    return max(mean_y - slope * mean_x, 0.0), max(slope, 0.0)
+
+
+def calibrate(lines, total_records):
+    """Fit processor timing parameters from "Batch timings" log lines
+
+    Each line must contain a JSON object as logged by the batch processor, with
+    records_processed and the per-phase *_seconds timings. Runs used for calibration
+    should be at low concurrency so that sign_seconds is not inflated by KMS throttling.
+
+    Args:
+        lines: Iterable of log lines
+        total_records: Number of rows in the records table during the measured runs
+
+    Returns:
+        dict: Calibrated parameter overrides
+    """
+    samples = []
+    for line in lines:
+        start = line.find("{")
+        if start < 0:
+            continue
+        try:
+            sample = json.loads(line[start:])
+        except ValueError:
+            continue
+        if sample.get("records_processed") and "sign_seconds" in sample:
+            samples.append(sample)
+
+    if not samples:
+        raise ValueError("No batch timing samples found")
+
+    records = [s["records_processed"] for s in samples]
+    calibration = {}
+
+    fetch_base, fetch_per_record = _least_squares(records, [s["fetch_seconds"] for s in samples])
+    calibration["fetch_base_seconds"] = fetch_base
+    calibration["fetch_per_record_seconds"] = fetch_per_record
+
+    # A batch of n records signs in n * mean on average, with variance n * std^2
+    sign_times = [s["sign_seconds"] for s in samples]
+    mean = sum(sign_times) / sum(records)
+    variance = sum((t - n * mean) ** 2 / n for t, n in zip(sign_times, records)) / len(samples)
+    calibration["kms_latency_mean"] = mean
+    calibration["kms_latency_sigma"] = math.sqrt(math.log(1 + variance / mean**2))
+
+    calibration["write_per_record_seconds"] = sum(s["write_seconds"] for s in samples) / sum(records)
+    calibration["key_seconds"] = sum(s["key_seconds"] for s in samples) / len(samples)
+    calibration["release_seconds"] = sum(s.get("release_seconds", 0.0) for s in samples) / len(samples)
+
+    count_seconds = sum(s["count_seconds"] for s in samples) / len(samples)
+    calibration["count_base_seconds"] = 0.0
+    calibration["count_per_row_seconds"] = count_seconds / total_records
+
+    return calibration
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _parse_assignments(parser, option, assignments):
+    """Split NAME=VALUE assignments, rejecting unknown names and missing values"""
+    params = {}
+    for assignment in assignments or []:
+        name, separator, value = assignment.partition("=")
+        if name not in DEFAULT_PARAMS:
+            parser.error(f"{option}: unknown parameter: {name}")
+        if not separator or not value:
+            parser.error(f"{option}: missing value for {name}, expected {name}=VALUE")
+        params[name] = value
+    return params
+
+
+def _check_value(parser, option, name, value):
+    """Reject values that cannot stand in for the parameter's default"""
+    default = DEFAULT_PARAMS[name]
+    is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(default, bool):
+        valid = isinstance(value, bool)
+    elif isinstance(default, (int, float)) or default is None:
+        valid = is_number or (default is None and value is None)
+    else:
+        valid = isinstance(value, str) and value != ""
+    if not valid:
+        parser.error(f"{option}: invalid value for {name}: {value!r}")
+    return value
+
+
+def _load_params(parser, args):
+    params = {}
+    if args.calibration:
+        with open(args.calibration) as f:
+            params.update(json.load(f))
+    for name, value in _parse_assignments(parser, "--set", args.set).items():
+        params[name] = _check_value(parser, "--set", name, _parse_value(value))
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the record signing workflow")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Simulate a single configuration")
+    sweep_parser = subparsers.add_parser("sweep", help="Simulate a grid of configurations")
+    for sub in (run_parser, sweep_parser):
+        sub.add_argument("--calibration", help="JSON file of calibrated parameter overrides")
+        sub.add_argument("--set", action="append", metavar="NAME=VALUE", help="Override a parameter")
+
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--observed-seconds", type=float, help="Measured run time to compare against")
+
+    sweep_parser.add_argument("--grid", action="append", required=True, metavar="NAME=V1,V2,...")
+    sweep_parser.add_argument("--replications", type=int, default=3)
+    sweep_parser.add_argument("--workers", type=int, default=1)
+    sweep_parser.add_argument(
+        "--sort", default="total_seconds", choices=("finished_rate",) + SUMMARY_FIELDS, help="Column to sort results by"
+    )
+    sweep_parser.add_argument("--top", type=int, help="Only output the best N configurations")
+    sweep_parser.add_argument("--output", help="CSV file to write, defaults to stdout")
+
+    calibrate_parser = subparsers.add_parser("calibrate", help="Fit timing parameters from batch timing logs")
+    calibrate_parser.add_argument("log_file", help="File with the processor's 'Batch timings' log lines")
+    calibrate_parser.add_argument("--total-records", type=int, required=True, help="Rows in the measured table")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        result = simulate(_load_params(parser, args), args.seed)
+        if args.observed_seconds:
+            result["observed_seconds"] = args.observed_seconds
+            result["error_ratio"] = (result["total_seconds"] - args.observed_seconds) / args.observed_seconds
+        print(json.dumps(result, indent=2))
+
+    elif args.command == "sweep":
+        grid = {
+            name: [_check_value(parser, "--grid", name, _parse_value(value)) for value in values.split(",")]
+            for name, values in _parse_assignments(parser, "--grid", args.grid).items()
+        }
+        summaries = sweep(_load_params(parser, args), grid, args.replications, args.workers)
+        # Configurations that did not finish go last
+        summaries.sort(key=lambda s: (-s["finished_rate"], s[args.sort]))
+        if args.top:
+            summaries = summaries[: args.top]
+
+        output = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            writer = csv.DictWriter(output, fieldnames=list(summaries[0]))
+            writer.writeheader()
+            writer.writerows(summaries)
+        finally:
+            if args.output:
+                output.close()
+
+    elif args.command == "calibrate":
+        with open(args.log_file) as f:
+            calibration = calibrate(f, args.total_records)
+        print(json.dumps(calibration, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,9 @@ def lambda_handler(event, context):
         "batch_id": "unique_batch_identifier",
         "execution_arn": "step_function_execution_arn",
         "batch_size": 100,  # Optional, can use environment variable
-        "start_time": "iso_timestamp"  # Optional, for process timing
+        "start_time": "iso_timestamp",  # Optional, for process timing
+        "retired_keys": [],  # Optional, re-sign records signed by these keys instead of unsigned ones
+        "partition": 0  # Optional, partition of the records table to work within
     }
     """
     batch_start_time = time.time()
@@ -34,12 +36,16 @@ def lambda_handler(event, context):
 
     batch_id = event.get("batch_id")
     process_start_time = event.get("start_time")  # Preserve for overall process timing
+    retired_keys = event.get("retired_keys", [])
+    partition = event.get("partition")
 
     if not batch_id:
         if "Records" in event and len(event["Records"]) > 0:
             message = json.loads(event["Records"][0]["body"])
             batch_id = message.get("batch_id")
             process_start_time = message.get("start_time")
+            retired_keys = message.get("retired_keys", [])
+            partition = message.get("partition")
 
     if not batch_id:
         raise ValueError("No batch_id provided in event or SQS message")
@@ -50,11 +56,20 @@ def lambda_handler(event, context):
     try:
         batch_size = event.get("batch_size", int(os.environ.get("BATCH_SIZE", "100")))
 
-        logger.info(f"Fetching batch of {batch_size} unsigned records")
-        records = db.get_unsigned_batch(batch_size)
+        # Per-phase timings, logged for calibrating the offline simulator
+        timings = {}
+        phase_start_time = time.time()
+
+        if retired_keys:
+            logger.info(f"Fetching batch of {batch_size} records signed by retired keys")
+            records = db.get_resign_batch(retired_keys, batch_size, partition)
+        else:
+            logger.info(f"Fetching batch of {batch_size} unsigned records")
+            records = db.get_unsigned_batch(batch_size, partition)
+        timings["fetch_seconds"] = time.time() - phase_start_time
 
         if not records:
-            logger.info("No unsigned records found to process")
+            logger.info("No records found to process")
             db.close()
             return {
                 "status": "completed",
@@ -63,20 +78,26 @@ def lambda_handler(event, context):
             }
 
         logger.info("Requesting signing key")
+        phase_start_time = time.time()
         key_id = key_service.get_available_key()
+        timings["key_seconds"] = time.time() - phase_start_time
         logger.info(f"Using key: {key_id}")
 
         try:
             signature_data = []
             signed_time = datetime.now()
+            phase_start_time = time.time()
 
             for record_id, data in records:
                 signature = key_service.sign_data(key_id, data)
 
                 signature_data.append((signature, signed_time, key_id, record_id))
+            timings["sign_seconds"] = time.time() - phase_start_time
 
             logger.info(f"Updating {len(signature_data)} signatures in database")
-            db.update_signatures(signature_data)
+            phase_start_time = time.time()
+            db.update_signatures(signature_data, partition)
+            timings["write_seconds"] = time.time() - phase_start_time
 
             records_processed = len(signature_data)
 
@@ -84,21 +105,34 @@ def lambda_handler(event, context):
             # Release the key only if it was acquired
             if key_id:
                 logger.info(f"Releasing key: {key_id}")
+                phase_start_time = time.time()
                 key_service.release_key(key_id)
+                timings["release_seconds"] = time.time() - phase_start_time
 
-        remaining = db.count_remaining_records()
-        logger.info(f"Signed {records_processed} records. {remaining} records remaining.")
+        phase_start_time = time.time()
+        if retired_keys:
+            remaining = db.count_resign_records(retired_keys, partition)
+        else:
+            remaining = db.count_remaining_records(partition)
+        timings["count_seconds"] = time.time() - phase_start_time
+        scope = "" if partition is None else f" in partition {partition}"
+        logger.info(f"Signed {records_processed} records. {remaining} records remaining{scope}.")
 
         elapsed_time = time.time() - batch_start_time
         logger.info(f"Batch processing completed in {elapsed_time:.2f} seconds")
+        logger.info(f"Batch timings: {json.dumps({'records_processed': records_processed, **timings})}")
 
         result = {
             "status": "in_progress" if remaining > 0 else "completed",
             "batch_id": batch_id,
             "records_processed": records_processed,
             "records_remaining": remaining,
+            "timings": timings,
         }
 
+        if partition is not None:
+            result["partition"] = partition
+
         if process_start_time:
             result["start_time"] = process_start_time
 
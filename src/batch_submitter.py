@@ -26,7 +26,10 @@ def lambda_handler(event, context):
         "execution_arn": "step_function_execution_arn",
         "batch_size": 10000,  # Number of records per batch
         "concurrency": 10,  # Number of concurrent batches to process
-        "direct_invoke": false  # Whether to invoke processor directly instead of using SQS
+        "direct_invoke": false,  # Whether to invoke processor directly instead of using SQS
+        "retired_keys": [],  # Key IDs (ARNs) being rotated out; enables re-signing mode
+        "partitions": [],  # Unfinished partitions of the records table, null if it is not partitioned
+        "partition_remaining": {}  # Records left per unfinished partition, as counted by the Checker
     }
     """
     logger.info(f"Starting batch submitter with event: {event}")
@@ -36,33 +39,63 @@ def lambda_handler(event, context):
     concurrency = event.get("concurrency", int(os.environ.get("DEFAULT_CONCURRENCY", 10)))
     direct_invoke = event.get("direct_invoke", os.environ.get("DIRECT_INVOKE", "false").lower() == "true")
     start_time = event.get("start_time", datetime.now().isoformat())
+    retired_keys = event.get("retired_keys", [])
+    partitions = event.get("partitions")
+    partition_remaining = event.get("partition_remaining")
 
     queue_url = os.environ.get("BATCH_QUEUE_URL")
     if not queue_url and not direct_invoke:
         logger.error("BATCH_QUEUE_URL environment variable not set")
         return {"status": "error", "message": "Missing required environment variable: BATCH_QUEUE_URL"}
 
-    db = Database()
-    try:
-        record_count = db.count_remaining_records()
-    finally:
-        db.close()
+    if partitions is not None and partition_remaining is not None:
+        # Reuse the Checker's per-partition counts rather than scanning the partitions again
+        partition_remaining = {partition: partition_remaining[str(partition)] for partition in partitions}
+        record_count = sum(partition_remaining.values())
+    else:
+        db = Database()
+        try:
+            if partitions is not None:
+                partition_remaining = db.count_remaining_by_partition(partitions, retired_keys)
+                record_count = sum(partition_remaining.values())
+            elif retired_keys:
+                record_count = db.count_resign_records(retired_keys)
+            else:
+                record_count = db.count_remaining_records()
+        finally:
+            db.close()
 
     if record_count <= 0:
         logger.info("No records to process")
         return {"status": "completed", "batches_submitted": 0, "records_remaining": 0, "start_time": start_time}
 
-    # Calculate number of batches to submit (limited by concurrency and available records)
-    batches_to_submit = min(concurrency, (record_count + batch_size - 1) // batch_size)
-    logger.info(f"Planning to submit {batches_to_submit} batches of up to {batch_size} records each")
+    # Calculate the batches to submit (limited by concurrency and available records)
+    if partitions is not None:
+        # Spread batches round-robin over the unfinished partitions, each batch confined to one partition
+        partition_batches = {
+            partition: (count + batch_size - 1) // batch_size for partition, count in partition_remaining.items()
+        }
+        batch_partitions = []
+        while len(batch_partitions) < concurrency and any(partition_batches.values()):
+            for partition in partitions:
+                if partition_batches[partition] > 0 and len(batch_partitions) < concurrency:
+                    batch_partitions.append(partition)
+                    partition_batches[partition] -= 1
+    else:
+        batch_partitions = [None] * min(concurrency, (record_count + batch_size - 1) // batch_size)
+    logger.info(f"Planning to submit {len(batch_partitions)} batches of up to {batch_size} records each")
 
     batches_submitted = 0
 
     # Submit batches
-    for i in range(batches_to_submit):
+    for partition in batch_partitions:
         batch_id = str(uuid.uuid4())
 
         batch_message = {"batch_id": batch_id, "execution_arn": execution_arn, "batch_size": batch_size}
+        if retired_keys:
+            batch_message["retired_keys"] = retired_keys
+        if partition is not None:
+            batch_message["partition"] = partition
 
         if direct_invoke:
             processor_function_name = os.environ.get("PROCESSOR_FUNCTION_NAME")
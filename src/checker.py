@@ -17,8 +17,12 @@ def lambda_handler(event, context):
     Lambda function to check the status of record signing process
 
     This function:
-    1. Checks how many records remain unsigned
-    2. Returns the count to the Step Function
+    1. Checks how many records remain unsigned (or, when retired_keys is set,
+       how many records are still signed by a retired key)
+    2. For a partitioned table (partitions is not null), counts only the unfinished
+       partitions, drops the ones that have no records left and returns the
+       per-partition counts for the Batch Submitter
+    3. Returns the count to the Step Function
 
     Returns:
         dict: Status information including records_remaining
@@ -28,18 +32,34 @@ def lambda_handler(event, context):
     batch_size = event.get("batch_size", int(os.environ.get("BATCH_SIZE", 10000)))
     concurrency = event.get("concurrency", int(os.environ.get("CONCURRENCY", 10)))
     start_time = event.get("start_time", datetime.now().isoformat())
+    retired_keys = event.get("retired_keys", [])
+    partitions = event.get("partitions")
 
     db = Database()
 
     try:
-        remaining = db.count_remaining_records()
-        logger.info(f"Found {remaining} unsigned records remaining")
+        partition_remaining = None
+        if partitions is not None:
+            counts = db.count_remaining_by_partition(partitions, retired_keys)
+            partitions = [partition for partition in partitions if counts[partition] > 0]
+            partition_remaining = {str(partition): counts[partition] for partition in partitions}
+            remaining = sum(counts.values())
+            logger.info(f"Found {remaining} records remaining in {len(partitions)} unfinished partitions")
+        elif retired_keys:
+            remaining = db.count_resign_records(retired_keys)
+            logger.info(f"Found {remaining} records remaining to re-sign")
+        else:
+            remaining = db.count_remaining_records()
+            logger.info(f"Found {remaining} unsigned records remaining")
 
         return {
             "status": "in_progress" if remaining > 0 else "completed",
             "records_remaining": remaining,
             "batch_size": batch_size,
             "concurrency": concurrency,
+            "retired_keys": retired_keys,
+            "partitions": partitions,
+            "partition_remaining": partition_remaining,
             "start_time": start_time,
         }
     except Exception as e:
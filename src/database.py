@@ -1,5 +1,6 @@
 import json
 import os
+import re
 
 import boto3
 import pg8000
@@ -69,16 +70,46 @@ class Database:
             self.conn.close()
             self.conn = None
 
-    def get_unsigned_batch(self, batch_size):
-        """Get a batch of unsigned records"""
+    def _table(self, partition=None):
+        """Return the table to query: the whole records table or a single partition of it"""
+        if partition is None:
+            return "records"
+        return f"records_p{int(partition)}"
+
+    def list_partitions(self):
+        """List the partition numbers of the records table
+
+        Partitions must be named records_p<N>.
+
+        Returns:
+            list: Sorted partition numbers, or None if the table is not partitioned
+        """
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        try:
+            if self._relkind(cursor, "records") != "p":
+                return None
+
+            child_tables = self._child_tables(cursor)
+            matches = {table: re.fullmatch(r"records_p(\d+)", table) for table in child_tables}
+            unsupported = sorted(table for table, match in matches.items() if not match)
+            if unsupported:
+                raise ValueError(f"Partitions of records must be named records_p<N>, found: {', '.join(unsupported)}")
+            return sorted(int(match.group(1)) for match in matches.values())
+        finally:
+            cursor.close()
+
+    def get_unsigned_batch(self, batch_size, partition=None):
+        """Get a batch of unsigned records, optionally from a single partition"""
         conn = self.connect()
         cursor = conn.cursor()
 
         try:
             cursor.execute(
-                """
+                f"""
                 SELECT id, data
-                FROM records
+                FROM {self._table(partition)}
                 WHERE signature IS NULL
                 LIMIT %s
                 FOR UPDATE SKIP LOCKED
@@ -95,11 +126,44 @@ class Database:
         finally:
             cursor.close()
 
-    def update_signatures(self, signature_data):
+    def get_resign_batch(self, retired_keys, batch_size, partition=None):
+        """Get a batch of records signed by any of the retired keys
+
+        Args:
+            retired_keys: List of key IDs (ARNs) whose signatures must be replaced
+            batch_size: Maximum number of records to return
+            partition: Optional partition number to restrict the batch to
+        """
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                f"""
+                SELECT id, data
+                FROM {self._table(partition)}
+                WHERE signed_by = ANY(%s)
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """,
+                (list(retired_keys), batch_size),
+            )
+
+            records = cursor.fetchall()
+            conn.commit()
+            return records
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            cursor.close()
+
+    def update_signatures(self, signature_data, partition=None):
         """Update signatures for a batch of records
 
         Args:
             signature_data: List of tuples (signature, signed_at, signed_by, record_id)
+            partition: Optional partition number the records belong to
         """
         conn = self.connect()
         cursor = conn.cursor()
@@ -107,8 +171,8 @@ class Database:
         try:
             for record in signature_data:
                 cursor.execute(
-                    """
-                    UPDATE records
+                    f"""
+                    UPDATE {self._table(partition)}
                     SET signature = %s, signed_at = %s, signed_by = %s
                     WHERE id = %s
                 """,
@@ -121,39 +185,150 @@ class Database:
         finally:
             cursor.close()
 
-    def count_remaining_records(self):
-        """Count unsigned records"""
+    def count_remaining_records(self, partition=None):
+        """Count unsigned records, optionally in a single partition"""
         conn = self.connect()
         cursor = conn.cursor()
 
         try:
-            cursor.execute("SELECT COUNT(*) FROM records WHERE signature IS NULL")
+            cursor.execute(f"SELECT COUNT(*) FROM {self._table(partition)} WHERE signature IS NULL")
             count = cursor.fetchone()[0]
             return count
         finally:
             cursor.close()
 
-    def initialize_records(self, num_records):
-        """Initialize the database with random records for testing"""
+    def count_resign_records(self, retired_keys, partition=None):
+        """Count records still signed by any of the retired keys, optionally in a single partition"""
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {self._table(partition)} WHERE signed_by = ANY(%s)", (list(retired_keys),)
+            )
+            count = cursor.fetchone()[0]
+            return count
+        finally:
+            cursor.close()
+
+    def count_remaining_by_partition(self, partitions, retired_keys=None):
+        """Count the records left to sign in each of the given partitions
+
+        Only the given partitions are scanned, so partitions that have already
+        finished can be left out entirely.
+
+        Args:
+            partitions: List of partition numbers to count
+            retired_keys: Optional list of retired key IDs; counts records to re-sign instead of unsigned ones
+
+        Returns:
+            dict: Mapping of partition number to remaining record count
+        """
+        if retired_keys:
+            return {partition: self.count_resign_records(retired_keys, partition) for partition in partitions}
+        return {partition: self.count_remaining_records(partition) for partition in partitions}
+
+    def _relkind(self, cursor, name):
+        """Return the pg_class relkind of a relation, or None if it does not exist"""
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (name,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _child_tables(self, cursor):
+        """Return the names of the partitions attached to the records table"""
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'records'::regclass
+        """
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def _create_index_concurrently(self, cursor, index, table):
+        """Build an index without blocking writes, replacing an invalid one left by an interrupted build"""
+        cursor.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", (index,))
+        row = cursor.fetchone()
+        if row and not row[0]:
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+        cursor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} (signed_by)")
+
+    def create_signed_by_index(self):
+        """Create the index used to select records by signing key
+
+        The index is built concurrently so writes to records are not blocked.
+        Partitioned tables cannot be indexed concurrently as a whole, so each
+        partition is indexed on its own and attached to an index on the parent.
+        """
+        conn = self.connect()
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        conn.commit()
+        conn.autocommit = True
+        cursor = conn.cursor()
+
+        try:
+            if self._relkind(cursor, "records") == "p":
+                child_tables = self._child_tables(cursor)
+                for table in child_tables:
+                    self._create_index_concurrently(cursor, f"{table}_signed_by_idx", table)
+                cursor.execute("CREATE INDEX IF NOT EXISTS records_signed_by_idx ON ONLY records (signed_by)")
+                for table in child_tables:
+                    cursor.execute(f"ALTER INDEX records_signed_by_idx ATTACH PARTITION {table}_signed_by_idx")
+            else:
+                self._create_index_concurrently(cursor, "records_signed_by_idx", "records")
+        finally:
+            cursor.close()
+            conn.autocommit = False
+
+    def initialize_records(self, num_records, num_partitions=0, partition_strategy="hash"):
+        """Initialize the database with random records for testing
+
+        Args:
+            num_records: Number of random records to insert
+            num_partitions: Number of partitions to split the records table into (0 for a plain table)
+            partition_strategy: "hash" to partition on a hash of id, "range" to partition on id ranges
+        """
         import random
         import string
 
+        if partition_strategy not in ("hash", "range"):
+            raise ValueError(f"Unsupported partition strategy: {partition_strategy}")
+
+        if partition_strategy == "range" and num_partitions > 0 and num_records < num_partitions:
+            raise ValueError("Range partitioning needs at least as many records as partitions")
+
         conn = self.connect()
         cursor = conn.cursor()
 
         try:
+            if num_partitions > 0 and self._relkind(cursor, "records") not in (None, "p"):
+                raise ValueError("Cannot create partitions: records already exists as an unpartitioned table")
+
+            partition_clause = f"PARTITION BY {partition_strategy.upper()} (id)" if num_partitions > 0 else ""
             cursor.execute(
-                """
+                f"""
                 CREATE TABLE IF NOT EXISTS records (
                     id SERIAL PRIMARY KEY,
                     data TEXT NOT NULL,
                     signature TEXT,
                     signed_at TIMESTAMP,
                     signed_by TEXT
-                )
+                ) {partition_clause}
             """
             )
 
+            # Range partitions split the expected ids evenly, with the last one open-ended
+            range_width = (num_records + num_partitions - 1) // num_partitions if num_partitions > 0 else 0
+            for i in range(num_partitions):
+                if partition_strategy == "hash":
+                    bounds = f"WITH (MODULUS {num_partitions}, REMAINDER {i})"
+                else:
+                    lower = "MINVALUE" if i == 0 else i * range_width + 1
+                    upper = "MAXVALUE" if i == num_partitions - 1 else (i + 1) * range_width + 1
+                    bounds = f"FROM ({lower}) TO ({upper})"
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {self._table(i)} PARTITION OF records FOR VALUES {bounds}")
+
             # Generate random data for records
             # Break it into batches for better performance
             batch_size = 1000
@@ -168,9 +343,11 @@ class Database:
                 cursor.executemany("INSERT INTO records (data) VALUES (%s)", batch_data)
 
             conn.commit()
-            return num_records
         except Exception as e:
             conn.rollback()
             raise e
         finally:
             cursor.close()
+
+        self.create_signed_by_index()
+        return num_records
@@ -22,38 +22,75 @@ def lambda_handler(event, context):
         "batch_size": 100,  # Number of records per batch
         "concurrency": 10,  # Number of concurrent batches
         "total_records": 100000,  # Total records to initialize (only for testing)
+        "num_partitions": 0,  # Number of partitions for the records table (only for testing, 0 for none)
+        "partition_strategy": "hash",  # "hash" or "range" partitioning on id (only for testing)
         "initialize_db": false,  # Whether to initialize the database with test data
-        "initialize_keys": false  # Whether to initialize the key store with test keys
+        "initialize_keys": false,  # Whether to initialize the key store with test keys
+        "retired_keys": []  # Key IDs (ARNs) to rotate out; enables re-signing mode
     }
+
+    When retired_keys is provided, only records signed by those keys are re-signed
+    with the remaining keys, and records_remaining counts those records instead of
+    unsigned ones.
+
+    When the records table is partitioned, the returned partitions list holds the
+    partitions that still have records to sign, and partition_remaining their counts;
+    batches are then confined to a single partition and finished partitions are no
+    longer scanned. Both are null when the table is not partitioned.
     """
     logger.info(f"Initializing record signing process with event: {event}")
 
     batch_size = event.get("batch_size", int(os.environ.get("BATCH_SIZE", 100)))
     concurrency = event.get("concurrency", int(os.environ.get("CONCURRENCY", 10)))
     total_records = event.get("total_records", 100000)
-    initialize_db = event.get("initialize_db", True)
-    initialize_keys = event.get("initialize_keys", True)
+    num_partitions = event.get("num_partitions", 0)
+    partition_strategy = event.get("partition_strategy", "hash")
+    retired_keys = event.get("retired_keys", [])
+    initialize_db = event.get("initialize_db", not retired_keys)
+    initialize_keys = event.get("initialize_keys", not retired_keys)
 
     db = Database()
     key_service = KeyManagementService(db)
 
     # For testing: Initialize database with random records
     if initialize_db:
-        logger.info(f"Initializing database with {total_records} records")
-        db.initialize_records(total_records)
+        logger.info(f"Initializing database with {total_records} records in {num_partitions} partitions")
+        db.initialize_records(total_records, num_partitions, partition_strategy)
 
     # For testing: Initialize key store with test keys
     if initialize_keys:
         logger.info("Initializing key store with test keys")
         key_service.generate_test_keys(100)  # Generate 100 test keys
 
-    record_count = db.count_remaining_records()
-    logger.info(f"Found {record_count} unsigned records")
+    if retired_keys:
+        logger.info(f"Retiring {len(retired_keys)} keys: {retired_keys}")
+        for key_id in retired_keys:
+            key_service.retire_key(key_id)
+
+        db.create_signed_by_index()
+
+    partitions = db.list_partitions()
+    partition_remaining = None
+    if partitions is not None:
+        counts = db.count_remaining_by_partition(partitions, retired_keys)
+        partitions = [partition for partition in partitions if counts[partition] > 0]
+        partition_remaining = {str(partition): counts[partition] for partition in partitions}
+        record_count = sum(counts.values())
+        logger.info(f"Found {record_count} records to sign in {len(partitions)} unfinished partitions")
+    elif retired_keys:
+        record_count = db.count_resign_records(retired_keys)
+        logger.info(f"Found {record_count} records to re-sign")
+    else:
+        record_count = db.count_remaining_records()
+        logger.info(f"Found {record_count} unsigned records")
 
     return {
         "status": "initialized",
         "batch_size": batch_size,
         "concurrency": concurrency,
+        "retired_keys": retired_keys,
+        "partitions": partitions,
+        "partition_remaining": partition_remaining,
         "records_remaining": record_count,
         "start_time": datetime.now().isoformat(),
     }
@@ -49,8 +49,10 @@ class KeyManagementService:
             str: key_id (ARN of the KMS key)
         """
         # Query DynamoDB for available keys, sorted by last_used
+        # Retired keys are never handed out again, even once they are released
         response = self.key_usage_table.scan(
-            FilterExpression="in_use = :false", ExpressionAttributeValues={":false": False}
+            FilterExpression="in_use = :false AND (attribute_not_exists(retired) OR retired = :false)",
+            ExpressionAttributeValues={":false": False},
         )
 
         available_keys = sorted(response["Items"], key=lambda k: k["last_used"])
@@ -78,6 +80,24 @@ class KeyManagementService:
             ExpressionAttributeValues={":false": False, ":time": current_time},
         )
 
+    def retire_key(self, key_id):
+        """Mark a key as retired so it is no longer used for signing
+
+        Raises:
+            ValueError: If the key is not in the key usage table
+        """
+        try:
+            self.key_usage_table.update_item(
+                Key={"key_id": key_id},
+                UpdateExpression="SET retired = :true",
+                ConditionExpression="attribute_exists(key_id)",
+                ExpressionAttributeValues={":true": True},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                raise ValueError(f"Unknown signing key: {key_id}")
+            raise
+
     def sign_data(self, key_id, data):
         """Sign data with the specified KMS key
 
@@ -0,0 +1,37 @@
+import os
+import sys
+import types
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+class ClientError(Exception):
+    def __init__(self, error_response, operation_name):
+        super().__init__(error_response["Error"]["Code"])
+        self.response = error_response
+        self.operation_name = operation_name
+
+
+# The Lambda modules create AWS clients at import time, so the AWS SDK, the
+# database driver and dotenv are replaced before any of them is imported
+boto3 = types.ModuleType("boto3")
+boto3.client = mock.MagicMock(name="boto3.client")
+boto3.resource = mock.MagicMock(name="boto3.resource")
+boto3.session = mock.MagicMock(name="boto3.session")
+botocore = types.ModuleType("botocore")
+botocore_exceptions = types.ModuleType("botocore.exceptions")
+botocore_exceptions.ClientError = ClientError
+botocore.exceptions = botocore_exceptions
+dotenv = types.ModuleType("dotenv")
+dotenv.load_dotenv = lambda *args, **kwargs: None
+
+sys.modules.update(
+    {
+        "boto3": boto3,
+        "botocore": botocore,
+        "botocore.exceptions": botocore_exceptions,
+        "dotenv": dotenv,
+        "pg8000": types.ModuleType("pg8000"),
+    }
+)
@@ -0,0 +1,19 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from key_management import KeyManagementService
+
+
+def test_retire_key_rejects_unknown_key():
+    key_service = KeyManagementService(db_connection=None)
+    key_service.key_usage_table.update_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}},
+        "UpdateItem",
+    )
+
+    with pytest.raises(ValueError, match="Unknown signing key: arn:typo"):
+        key_service.retire_key("arn:typo")
+
+    assert key_service.key_usage_table.update_item.call_args.kwargs["ConditionExpression"] == (
+        "attribute_exists(key_id)"
+    )
@@ -0,0 +1,94 @@
+import json
+import math
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from simulator import calibrate, main, simulate  # noqa: E402
+
+
+def test_short_visibility_timeout_redelivers_running_batches():
+    params = {"batch_size": 1000, "concurrency": 1, "sqs_batch_size": 1}
+
+    baseline = simulate(dict(params, visibility_timeout=300))
+    short = simulate(dict(params, visibility_timeout=5))
+
+    assert baseline["finished"] and short["finished"]
+    assert baseline["double_signed"] == 0
+    # Messages reappear while their processor is still signing, so the same rows are signed again
+    assert short["invocations"] > baseline["invocations"]
+    assert short["double_signed"] > 0
+
+
+def test_kms_throttling_fails_and_redelivers_batches():
+    params = {"batch_size": 1000, "sqs_batch_size": 1, "row_locking": "held"}
+
+    unthrottled = simulate(dict(params, concurrency=10))
+    throttled = simulate(dict(params, concurrency=50))
+
+    assert unthrottled["kms_throttle_errors"] == 0
+    assert throttled["finished"]
+    assert throttled["kms_throttle_errors"] > 0
+    assert throttled["failed_invocations"] >= throttled["kms_throttle_errors"]
+    # Throttled processors still release their keys, so none leak
+    assert throttled["leaked_keys"] == 0
+
+
+def test_calibrate_recovers_timing_parameters():
+    rng = random.Random(1)
+    mean, sigma = 0.02, 0.5
+    mu = math.log(mean) - sigma**2 / 2
+
+    lines = []
+    for _ in range(200):
+        records = rng.choice([500, 1000, 2000])
+        timings = {
+            "records_processed": records,
+            "fetch_seconds": 0.01 + 0.000003 * records,
+            "key_seconds": 0.04,
+            "sign_seconds": sum(rng.lognormvariate(mu, sigma) for _ in range(records)),
+            "write_seconds": 0.0004 * records,
+            "release_seconds": 0.01,
+            "count_seconds": 0.05,
+        }
+        lines.append(f"[INFO] Batch timings: {json.dumps(timings)}")
+    lines.append("[INFO] Batch processing completed in 20.00 seconds")
+
+    calibration = calibrate(lines, total_records=100000)
+
+    assert calibration["kms_latency_mean"] == pytest.approx(mean, rel=0.01)
+    assert calibration["kms_latency_sigma"] == pytest.approx(sigma, rel=0.1)
+    assert calibration["fetch_base_seconds"] == pytest.approx(0.01)
+    assert calibration["fetch_per_record_seconds"] == pytest.approx(0.000003)
+    assert calibration["write_per_record_seconds"] == pytest.approx(0.0004)
+    assert calibration["key_seconds"] == pytest.approx(0.04)
+    assert calibration["count_per_row_seconds"] == pytest.approx(0.05 / 100000)
+
+
+def test_calibrate_rejects_logs_without_timings():
+    with pytest.raises(ValueError, match="No batch timing samples found"):
+        calibrate(["[INFO] Batch processing completed in 20.00 seconds"], total_records=100000)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["run", "--set", "batch_size"],
+        ["run", "--set", "batch_size="],
+        ["run", "--set", "batch_size=abc"],
+        ["run", "--set", "unknown=1"],
+        ["sweep", "--grid", "batch_size="],
+        ["sweep", "--grid", "batch_size=1000,,2000"],
+        ["sweep", "--grid", "batch_size=1000", "--sort", "unknown"],
+    ],
+)
+def test_invalid_arguments_are_rejected_before_simulating(argv, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        main(argv)
+
+    assert exc_info.value.code == 2
+    assert "error" in capsys.readouterr().err
@@ -0,0 +1,170 @@
+import json
+import os
+import re
+
+import pytest
+
+import batch_submitter
+import checker
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), "..", "cloudformattion.yaml")
+
+
+def _state_machine_states():
+    """Load the States of the signing state machine from the CloudFormation template"""
+    with open(TEMPLATE) as f:
+        template = f.read()
+    definition = re.search(r"DefinitionString: !Sub \|\n(.*?)\n\n", template, re.S).group(1)
+    return json.loads(definition)["States"]
+
+
+class FakeDatabase:
+    """In-memory stand-in for Database that records which counts were run"""
+
+    def __init__(self, unsigned=0, resign=0, partitions=None):
+        self.unsigned = unsigned
+        self.resign = resign
+        self.partitions = partitions or {}
+        self.calls = []
+
+    def count_remaining_records(self, partition=None):
+        self.calls.append(("count_remaining_records", partition))
+        return self.unsigned if partition is None else self.partitions[partition]
+
+    def count_resign_records(self, retired_keys, partition=None):
+        self.calls.append(("count_resign_records", partition))
+        return self.resign if partition is None else self.partitions[partition]
+
+    def count_remaining_by_partition(self, partitions, retired_keys=None):
+        self.calls.append(("count_remaining_by_partition", tuple(partitions)))
+        return {partition: self.partitions[partition] for partition in partitions}
+
+    def close(self):
+        pass
+
+
+class FakeQueue:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, QueueUrl, MessageBody):
+        self.messages.append(json.loads(MessageBody))
+
+
+@pytest.fixture
+def workflow(monkeypatch):
+    """Replay the Check -> Submit -> Check loop the way Step Functions passes state between the Lambdas"""
+    db = FakeDatabase()
+    queue = FakeQueue()
+    monkeypatch.setattr(checker, "Database", lambda: db)
+    monkeypatch.setattr(batch_submitter, "Database", lambda: db)
+    monkeypatch.setattr(batch_submitter, "sqs", queue)
+    monkeypatch.setenv("BATCH_QUEUE_URL", "https://sqs.example/queue")
+    monkeypatch.setenv("DIRECT_INVOKE", "false")
+
+    submit_state = _state_machine_states()["SubmitBatches"]
+
+    def submit(state):
+        event = {}
+        for name, path in submit_state["Parameters"].items():
+            event[name.removesuffix(".$")] = (
+                "execution-id" if path.startswith("$$.") else state[path.removeprefix("$.")]
+            )
+        result = batch_submitter.lambda_handler(event, None)
+
+        result_path = submit_state.get("ResultPath", "$")
+        if result_path == "$":
+            return result
+        return dict(state, **{result_path.removeprefix("$."): result})
+
+    return db, queue, submit
+
+
+def test_rotation_state_survives_submit_batches(workflow):
+    db, queue, submit = workflow
+    db.resign = 25000
+    retired_keys = ["arn:aws:kms:us-east-1:123456789012:key/retired"]
+
+    state = checker.lambda_handler(
+        {"batch_size": 10000, "concurrency": 2, "retired_keys": retired_keys, "partitions": None}, None
+    )
+    state = submit(state)
+    assert [message["retired_keys"] for message in queue.messages] == [retired_keys, retired_keys]
+
+    # The processors re-sign the submitted batches while the state machine waits
+    db.resign = 5000
+    state = checker.lambda_handler(state, None)
+
+    assert state["retired_keys"] == retired_keys
+    assert state["records_remaining"] == 5000
+    assert state["batch_size"] == 10000
+    assert state["concurrency"] == 2
+    assert ("count_remaining_records", None) not in db.calls
+
+
+def test_partition_state_survives_submit_batches(workflow):
+    db, queue, submit = workflow
+    db.partitions = {0: 0, 1: 25000, 2: 3000}
+
+    state = checker.lambda_handler({"batch_size": 10000, "concurrency": 10, "partitions": [0, 1, 2]}, None)
+    assert state["partitions"] == [1, 2]
+    assert state["partition_remaining"] == {"1": 25000, "2": 3000}
+
+    state = submit(state)
+    assert all("partition" in message for message in queue.messages)
+
+    # Partition 2 finishes while the state machine waits
+    db.partitions.update({1: 5000, 2: 0})
+    state = checker.lambda_handler(state, None)
+
+    assert state["partitions"] == [1]
+    assert state["partition_remaining"] == {"1": 5000}
+    assert state["records_remaining"] == 5000
+    assert state["batch_size"] == 10000
+    assert db.calls[-1] == ("count_remaining_by_partition", (1, 2))
+
+    # Once every partition has finished, the whole table is never counted
+    db.partitions[1] = 0
+    state = checker.lambda_handler(submit(state), None)
+    state = checker.lambda_handler(state, None)
+
+    assert state["partitions"] == []
+    assert state["records_remaining"] == 0
+    assert db.calls[-1] == ("count_remaining_by_partition", ())
+    assert ("count_remaining_records", None) not in db.calls
+
+
+def test_submitter_reuses_checker_partition_counts(workflow):
+    db, queue, submit = workflow
+
+    result = batch_submitter.lambda_handler(
+        {"batch_size": 10000, "concurrency": 10, "partitions": [1, 2], "partition_remaining": {"1": 25000, "2": 3000}},
+        None,
+    )
+
+    assert result["records_remaining"] == 28000
+    assert db.calls == []
+
+
+@pytest.mark.parametrize(
+    "concurrency, expected",
+    [
+        (10, [1, 2, 1, 1]),
+        (2, [1, 2]),
+        (1, [1]),
+    ],
+)
+def test_submitter_spreads_batches_round_robin_over_partitions(workflow, concurrency, expected):
+    db, queue, submit = workflow
+
+    batch_submitter.lambda_handler(
+        {
+            "batch_size": 10000,
+            "concurrency": concurrency,
+            "partitions": [1, 2],
+            "partition_remaining": {"1": 25000, "2": 3000},
+        },
+        None,
+    )
+
+    assert [message["partition"] for message in queue.messages] == expected